@@ -28,10 +28,23 @@ class AutoOffsetZCalibration:
         self.offset_max = config.getfloat('offset_max', 1)
         self.endstop_min = config.getfloat('endstop_min', 0)
         self.endstop_max = config.getfloat('endstop_max', 0)
+        if (self.endstop_min != 0 and self.endstop_max != 0
+                and self.endstop_min > self.endstop_max):
+            raise config.error("AutoOffsetZ: endstop_min (%.3f) must not be greater than endstop_max (%.3f)." % (self.endstop_min,self.endstop_max))
         self.gcode = self.printer.lookup_object('gcode')
         self.gcode_move = self.printer.lookup_object('gcode_move')
+        # reusable command to reset the z offset before probing
+        self._zero_cmd = self.gcode.create_gcode_command("SET_GCODE_OFFSET",
+                                                         "SET_GCODE_OFFSET",
+                                                         {'Z': 0})
+        self.toolhead = None
+        self.reactor = None
+        self.aligner = None
+        self.printer.register_event_handler("klippy:ready", self._handle_ready)
         #added
         self.endstopswitch = config.getfloat('endstopswitch', 0.5)
+        # offsets are rounded to 3 decimals
+        self._round_scale = 1000.0
        
        # TODO: verify that z_hop section
         if config.has_section("safe_z_home"):
@@ -85,13 +98,10 @@ class AutoOffsetZCalibration:
                                                 parser=float, count=2)
         
         #somehow probeHelper doesn't respect the settings of the offsets. doing it manually.
-        self.pointsEndstop = list(self.probePoints[0])
-        self.pointsBed = list(self.probePoints[1])
-        self.pointsEndstop[0] -= self.x_offset
-        self.pointsEndstop[1] -= self.y_offset
-        self.pointsBed[0] -= self.x_offset
-        self.pointsBed[1] -= self.y_offset
-        self.probePoints = (self.pointsEndstop,self.pointsBed)
+        ex, ey = self.probePoints[0]
+        bx, by = self.probePoints[1]
+        self.probePoints = ((ex - self.x_offset, ey - self.y_offset),
+                            (bx - self.x_offset, by - self.y_offset))
         
         self.probe_helper = probe.ProbePointsHelper(config,self.probe_finalize, default_points=self.probePoints)
         self.probe_helper.minimum_points(2)
@@ -100,23 +110,26 @@ class AutoOffsetZCalibration:
 
         logging.info("AutoOffsetZ: init done")
 
+    def _handle_ready(self):
+        # objects are stable after connect - look them up once instead of per command
+        self.toolhead = self.printer.lookup_object('toolhead')
+        self.reactor = self.printer.get_reactor()
+        if self.adjusttype == "qgl":
+            self.aligner = self.printer.lookup_object('quad_gantry_level')
+        elif self.adjusttype == "ztilt":
+            self.aligner = self.printer.lookup_object('z_tilt')
+
 
 
 
-    # custom round operation based mathematically instead of python default cutting off
-    def rounding(self,n, decimals=0):
-        expoN = n * 10 ** decimals
-        if abs(expoN) - abs(math.floor(expoN)) < 0.5:
-            return math.floor(expoN) / 10 ** decimals
-        return math.ceil(expoN) / 10 ** decimals
+    # custom round operation (half away from zero) instead of python default banker's rounding
+    def rounding(self, n):
+        return math.trunc(n * self._round_scale + math.copysign(0.5, n)) / self._round_scale
 
     def cmd_AUTO_OFFSET_Z(self, gcmd):
         # check if all axes are homed
-        toolhead = self.printer.lookup_object('toolhead')
-        curtime = self.printer.get_reactor().monotonic()
-        kin_status = toolhead.get_kinematics().get_status(curtime)
-        probe_obj = self.printer.lookup_object('probe', None)
-        skip = 0
+        curtime = self.reactor.monotonic()
+        kin_status = self.toolhead.get_kinematics().get_status(curtime)
 
         # debug output start #
         # gcmd.respond_raw("AutoOffsetZ (Homeing Result): %s" % (kin_status))
@@ -133,7 +146,7 @@ class AutoOffsetZCalibration:
             # debug output end #
 
             # check if qgl has applied
-            alignment_status = self.printer.lookup_object('quad_gantry_level').get_status(gcmd)
+            alignment_status = self.aligner.get_status(gcmd)
             if alignment_status['applied'] != 1:
                 raise gcmd.error("AutoOffsetZ: Perform quad gantry leveling first.")
 
@@ -143,7 +156,7 @@ class AutoOffsetZCalibration:
             # debug output end #
 
             # check if ztilt has applied
-            alignment_status = self.printer.lookup_object('z_tilt').get_status(gcmd)
+            alignment_status = self.aligner.get_status(gcmd)
             if alignment_status['applied'] != 1:
                 raise gcmd.error("AutoOffsetZ: Perform Z tilt first.")
 
@@ -156,10 +169,7 @@ class AutoOffsetZCalibration:
         # gcmd.respond_raw("AutoOffsetZ (Alignment Result): %s" % (alignment_status))
         # debug output end #
 
-        gcmd_offset = self.gcode.create_gcode_command("SET_GCODE_OFFSET",
-                                                      "SET_GCODE_OFFSET",
-                                                      {'Z': 0})
-        self.gcode_move.cmd_SET_GCODE_OFFSET(gcmd_offset)
+        self.gcode_move.cmd_SET_GCODE_OFFSET(self._zero_cmd)
 
         #start probing using the probe_helper class
         self.probe_helper.start_probe(gcmd)
@@ -168,9 +178,7 @@ class AutoOffsetZCalibration:
         # calcualtion offset
         #logging.info("Calculating AutoOffsetZ  with (positions): %s", positions)
         #logging.info("Calculating AutoOffsetZ  with (offsets): %s", offsets) 
-     
-        gcode = self.printer.lookup_object('gcode')
-        
+
         zendstop = positions[0][2]
         zbed = positions[1][2]
         diffbedendstop = zendstop - zbed
@@ -179,33 +187,28 @@ class AutoOffsetZCalibration:
         #logging.info("Calculating AutoOffsetZ  with zendstop: %s", zendstop)
         #logging.info("Calculating AutoOffsetZ  with diffbedendstop: %s", diffbedendstop) 
         
-        offset = self.rounding((0 - diffbedendstop  + self.endstopswitch) + self.offsetadjust,3)
+        offset = self.rounding((0 - diffbedendstop  + self.endstopswitch) + self.offsetadjust)
         #logging.info("Calculating AutoOffsetZ  with (offset): %s", offset) 
         
-        gcode.respond_info("AutoOffsetZ:\nBed: %.3f\nEndstop: %.3f\nDiff: %.3f\nManual Adjust: %.3f\nTotal Calculated Offset: %.3f" % (zbed,zendstop,diffbedendstop,self.offsetadjust,offset,))
+        self.gcode.respond_info(f"AutoOffsetZ:\nBed: {zbed:.3f}\nEndstop: {zendstop:.3f}\nDiff: {diffbedendstop:.3f}\nManual Adjust: {self.offsetadjust:.3f}\nTotal Calculated Offset: {offset:.3f}")
                
 
         # failsave
         if offset < self.offset_min or offset > self.offset_max:
-            raise gcode.error("AutoOffsetZ: Your calculated offset is out of config limits! (Min: %.3f mm | Max: %.3f mm) - abort..." % (self.offset_min,self.offset_max))
+            raise self.gcode.error(f"AutoOffsetZ: Your calculated offset is out of config limits! (Min: {self.offset_min:.3f} mm | Max: {self.offset_max:.3f} mm) - abort...")
 
-        if self.endstop_min != 0 and zendstop[2] < self.endstop_min:
-            raise gcode.error("AutoOffsetZ: Your endstop value is out of config limits! (Min: %.3f mm | Meassured: %.3f mm) - abort..." % (self.endstop_min,zendstop[2]))
+        if self.endstop_min != 0 and zendstop < self.endstop_min:
+            raise self.gcode.error(f"AutoOffsetZ: Your endstop value is out of config limits! (Min: {self.endstop_min:.3f} mm | Meassured: {zendstop:.3f} mm) - abort...")
 
-        if self.endstop_max != 0 and zendstop[2] > self.endstop_max:
-            raise gcode.error("AutoOffsetZ: Your endstop value is out of config limits! (Max: %.3f mm | Meassured: %.3f mm) - abort..." % (self.endstop_max,zendstop[2]))
+        if self.endstop_max != 0 and zendstop > self.endstop_max:
+            raise self.gcode.error(f"AutoOffsetZ: Your endstop value is out of config limits! (Max: {self.endstop_max:.3f} mm | Meassured: {zendstop:.3f} mm) - abort...")
 
         self.set_offset(offset)
 
     cmd_AUTO_OFFSET_Z_help = "Test endstop and bed surface to calcualte g-code offset for Z"
 
     def set_offset(self, offset):
-        # reset pssible existing offset to zero
-        gcmd_offset = self.gcode.create_gcode_command("SET_GCODE_OFFSET",
-                                                      "SET_GCODE_OFFSET",
-                                                      {'Z': 0})
-        self.gcode_move.cmd_SET_GCODE_OFFSET(gcmd_offset)
-        # set new offset
+        # set new offset - Z= is absolute and overwrites any existing offset
         gcmd_offset = self.gcode.create_gcode_command("SET_GCODE_OFFSET",
                                                       "SET_GCODE_OFFSET",
                                                       {'Z': offset})